@@ -34,6 +34,10 @@ class I2CInterface(ABC):
     def write(self, data):
         assert 0 <= data <= 255
 
+    @abstractmethod
+    def read_ack(self):
+        pass
+
     @abstractmethod
     def read_ack_stop(self):
         pass
@@ -72,6 +76,10 @@ class MockI2CBus(I2CInterface):
     def __init__(self):
         self.slaves = set()
 
+        # Map of 7-bit address -> responding slaves. Built once on attach, thus
+        # slaves must not change the addresses they respond to afterwards.
+        self.addr_slaves = {}
+
         self.curtxn_valid = False
         self.curtxn_addr = 0x00
         self.curtxn_slaves = []
@@ -81,10 +89,21 @@ class MockI2CBus(I2CInterface):
         assert isinstance(slave, MockI2CSlave)
         self.slaves.add(slave)
 
+        for addr in range(128):
+            if slave.has_addr(addr):
+                self.addr_slaves.setdefault(addr, []).append(slave)
+
     def detach_slave(self, slave):
-        self.curtxn_slaves.remove(slave)
+        # Don't mutate curtxn_slaves in place, it may alias an addr_slaves list
+        self.curtxn_slaves = [s for s in self.curtxn_slaves if s is not slave]
         self.slaves.remove(slave)
 
+        for addr, slaves in list(self.addr_slaves.items()):
+            if slave in slaves:
+                slaves.remove(slave)
+            if len(slaves) == 0:
+                del self.addr_slaves[addr]
+
     def start(self, addr, rw):
         # Perform some basic sanity checks
         I2CInterface.start(self, addr, rw)
@@ -93,11 +112,7 @@ class MockI2CBus(I2CInterface):
         self.curtxn_rw = rw
         self.curtxn_valid = True
 
-        responding_slaves = filter(
-            lambda s: s.has_addr(addr),
-            self.slaves
-        )
-        self.curtxn_slaves = list(responding_slaves)
+        self.curtxn_slaves = self.addr_slaves.get(addr, [])
 
         for s in self.curtxn_slaves:
             # Announce a start condition to the respective slave
@@ -126,6 +141,22 @@ class MockI2CBus(I2CInterface):
         for s in self.curtxn_slaves:
             s.consume(data)
 
+    def read_ack(self):
+        # Peform some basic sanity checks
+        I2CInterface.read_ack(self)
+
+        # We need some valid transaction to read
+        if not self.curtxn_valid:
+            raise RuntimeError("I2C read attempted without valid transaction")
+
+        # Acknowledge the byte, the slaves continue with the next one
+        val = 0xFF
+        for s in self.curtxn_slaves:
+            val &= s.produce()
+            s.ack()
+
+        return val
+
     def read_ack_stop(self):
         # Peform some basic sanity checks
         I2CInterface.read_ack_stop(self)
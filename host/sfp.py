@@ -19,12 +19,12 @@ import pickle
 import logging
 import argparse
 import textwrap
-
-import ok
+import struct
 
 from .i2c import I2CRW, MockI2CBus, MockI2CSlave, I2CInterface
 from .xem_wishbone import XEMWishbone
 from .xem_i2c import WishboneI2C
+from .xem_open import open_xem
 
 class SFPType(IntEnum):
     # Invalid value, not part of the specification
@@ -145,9 +145,13 @@ class SFPMock(MockI2CSlave):
             self.log.warn(f"SFP: Unexpected ack(), {self.i2c_state}")
 
     def produce(self):
-        if self.i2c_state == "read_register":
+        if self.i2c_state in ["read_register", "awaiting_stop_cond"]:
+            # Reads after an acknowledged byte continue sequentially
+            self.log.debug(f"SFP: Reading register 0x{self.reg_addr:02x}, {self.i2c_state} -> read_register_awaiting_ack")
             self.i2c_state = "read_register_awaiting_ack"
-            return self.regs[self.i2c_addr << 1][self.reg_addr]
+            val = self.regs[self.i2c_addr << 1][self.reg_addr]
+            self.reg_addr = (self.reg_addr + 1) & 0xFF
+            return val
         else:
             raise NotImplementedError(f"SFP: Unexpected produce() in {self.i2c_state}")
 
@@ -174,6 +178,13 @@ class I2CSFP():
         "om4_len": (18, 1),
     }
 
+    # Address range spanning all of the above registers, such that they can be
+    # fetched using a single sequential read
+    INFORMATION_MEMORY_START = min(
+        addr for addr, _ in INFORMATION_MEMORY_MAP.values())
+    INFORMATION_MEMORY_END = max(
+        addr + length for addr, length in INFORMATION_MEMORY_MAP.values())
+
     DIAGNOSTIC_FIELDS = {
         "temp": {
             "bounds_addr": 0,
@@ -232,6 +243,28 @@ class I2CSFP():
         },
     }
 
+    # Diagnostic values and bounds are 16 bit big-endian integers, indexed by
+    # their "signed" field attribute
+    DIAGNOSTIC_VAL_STRUCTS = {
+        True: struct.Struct(">h"),
+        False: struct.Struct(">H"),
+    }
+
+    INFO_TEMPLATE = textwrap.dedent("""
+        Vendor:\t\t{vendor}
+        OUI:\t\t0x{oui:06x}
+        Rev:\t\t{rev}
+        PN:\t\t{pn}
+        SN:\t\t{sn}
+        DC:\t\t{dc}
+        Type:\t\t{type.name} (0x{type:02x})
+        Connector:\t{connector.name} (0x{connector:02x})
+        Bitrate:\t{bitrate} MBd
+        Wavelength:\t{wavelength} nm
+        \t\t        SM    OM1    OM2    OM3    OM4
+        Max length:\t{sm:8d} m {om1:4d} m {om2:4d} m {om3:4d} m {om4:4d} m
+    """)
+
     def __init__(self, i2c_bus):
         assert isinstance(i2c_bus, I2CInterface)
         self.i2c = i2c_bus
@@ -239,43 +272,46 @@ class I2CSFP():
         # Cached SFP device memory contents
         self.cache = {}
 
-    def __read_sfp_addr(self, bank, sfp_reg_addr):
+    def __read_sfp_block(self, bank, sfp_reg_addr, length):
+        # Sequential read: set the register address once and let the module
+        # auto-increment it with every acknowledged byte
+        assert length > 0
         self.i2c.start(int(bank) >> 1, I2CRW.WRITE)
         self.i2c.write(sfp_reg_addr)
         self.i2c.start(int(bank) >> 1, I2CRW.READ)
-        return self.i2c.read_ack_stop()
+        return (
+            [self.i2c.read_ack() for _ in range(length - 1)]
+            + [self.i2c.read_ack_stop()]
+        )
 
     def __get_info_reg(self, reg):
         assert reg in self.INFORMATION_MEMORY_MAP
-        reg_bounds = self.INFORMATION_MEMORY_MAP[reg]
 
         # Check in the cache first
-        if f"info_{reg}" in self.cache:
-            return self.cache[f"info_{reg}"]
+        if ("info", reg) in self.cache:
+            return self.cache[("info", reg)]
 
-        # Not in the cache, read the register
-        contents = [
-            self.__read_sfp_addr(self.SFPBank.INFO, addr)
-            for addr in range(reg_bounds[0], reg_bounds[0] + reg_bounds[1])
-        ]
+        # Not in the cache, read all information registers at once
+        start = self.INFORMATION_MEMORY_START
+        contents = bytes(self.__read_sfp_block(
+            self.SFPBank.INFO, start, self.INFORMATION_MEMORY_END - start))
 
-        # Place it in the cache
-        self.cache[f"info_{reg}"] = contents
+        # Place them in the cache
+        for r, (addr, length) in self.INFORMATION_MEMORY_MAP.items():
+            self.cache[("info", r)] = \
+                contents[addr - start:addr - start + length]
 
-        return contents
+        return self.cache[("info", reg)]
 
     def __get_diagnostic(self, diag):
         assert diag in self.DIAGNOSTIC_FIELDS
         df = self.DIAGNOSTIC_FIELDS[diag]
 
         # Ensure bounds are loaded in the cache first
-        if not f"diagbounds_{diag}" in self.cache:
-            read_bounds_data = [
-                self.__read_sfp_addr(
-                    self.SFPBank.DIAG, df["bounds_addr"] + i)
-                for i in range(8)
-            ]
-            self.cache[f"diagbounds_{diag}"] = {
+        if not ("diagbounds", diag) in self.cache:
+            read_bounds_data = self.__read_sfp_block(
+                self.SFPBank.DIAG, df["bounds_addr"], 8)
+            self.cache[("diagbounds", diag)] = {
                 # Positive error
                 "pos_error": bytes(read_bounds_data[0:2]),
                 # Negative error
@@ -287,17 +323,16 @@ class I2CSFP():
             }
 
         # Retrieve bounds from the cache
-        bounds = self.cache[f"diagbounds_{diag}"]
+        bounds = self.cache[("diagbounds", diag)]
 
         # Load raw value, never cached
-        val = bytes([
-            self.__read_sfp_addr(self.SFPBank.DIAG, df["val_addr"] + 0),
-            self.__read_sfp_addr(self.SFPBank.DIAG, df["val_addr"] + 1),
-        ])
+        val = bytes(self.__read_sfp_block(
+            self.SFPBank.DIAG, df["val_addr"], 2))
+
+        val_struct = self.DIAGNOSTIC_VAL_STRUCTS[df["signed"]]
 
         def convert(b):
-            v = int.from_bytes(b, byteorder="big", signed=df["signed"])
-            return v / df["div"]
+            return val_struct.unpack(b)[0] / df["div"]
 
         return {
             "val": convert(val),
@@ -313,62 +348,60 @@ class I2CSFP():
 
     def get_vendor(self):
         try:
-            return bytes(self.__get_info_reg("vendor")).decode('utf-8')
+            return self.__get_info_reg("vendor").decode('utf-8')
         except UnicodeDecodeError:
             return None
 
     def get_oui(self):
         return int.from_bytes(
-            bytes(self.__get_info_reg("oui")), byteorder="big")
+            self.__get_info_reg("oui"), byteorder="big")
 
     def get_rev(self):
         try:
-            return bytes(self.__get_info_reg("rev")).decode("utf-8")
+            return self.__get_info_reg("rev").decode("utf-8")
         except UnicodeDecodeError:
             return None
 
     def get_pn(self):
         try:
-            return bytes(self.__get_info_reg("pn")).decode("utf-8")
+            return self.__get_info_reg("pn").decode("utf-8")
         except UnicodeDecodeError:
             return None
 
     def get_sn(self):
         try:
-            return bytes(self.__get_info_reg("sn")).decode("utf-8")
+            return self.__get_info_reg("sn").decode("utf-8")
         except UnicodeDecodeError:
             return None
 
     def get_dc(self):
         try:
-            return bytes(self.__get_info_reg("dc")).decode("utf-8")
+            return self.__get_info_reg("dc").decode("utf-8")
         except UnicodeDecodeError:
             return None
 
     def get_type(self):
         raw_type = self.__get_info_reg("type")[0]
 
-        for t in SFPType:
-            if int(t) == raw_type:
-                return t
-
-        return SFPType.INVALID
+        try:
+            return SFPType(raw_type)
+        except ValueError:
+            return SFPType.INVALID
 
     def get_connector(self):
         raw_connector = self.__get_info_reg("connector")[0]
 
-        for c in SFPConnector:
-            if int(c) == raw_connector:
-                return c
-
-        return SFPConnector.INVALID
+        try:
+            return SFPConnector(raw_connector)
+        except ValueError:
+            return SFPConnector.INVALID
 
     def get_bitrate(self):
         return self.__get_info_reg("bitrate")[0] * 100
 
     def get_wavelength(self):
         return int.from_bytes(
-            bytes(self.__get_info_reg("wavelength")),
+            self.__get_info_reg("wavelength"),
             byteorder="big"
         )
 
@@ -383,26 +416,24 @@ class I2CSFP():
 
     def dump(self):
         return {
-            b: [self.__read_sfp_addr(b, a) for a in range(256)]
+            b: self.__read_sfp_block(b, 0, 256)
             for b in self.SFPBank
         }
 
     def print_info(self):
-        fl = self.get_max_fiber_lengths()
-        print(textwrap.dedent(f"""
-            Vendor:\t\t{self.get_vendor()}
-            OUI:\t\t0x{self.get_oui():06x}
-            Rev:\t\t{self.get_rev()}
-            PN:\t\t{self.get_pn()}
-            SN:\t\t{self.get_sn()}
-            DC:\t\t{self.get_dc()}
-            Type:\t\t{self.get_type().name} (0x{self.get_type():02x})
-            Connector:\t{self.get_connector().name} (0x{self.get_connector():02x})
-            Bitrate:\t{self.get_bitrate()} MBd
-            Wavelength:\t{self.get_wavelength()} nm
-            \t\t{'SM':>10s}{'OM1':>7s}{'OM1':>7s}{'OM3':>7s}{'OM4':>7s}
-            Max length:\t{fl['sm']:8d} m {fl['om1']:4d} m {fl['om2']:4d} m {fl['om3']:4d} m {fl['om4']:4d} m
-        """))
+        print(self.INFO_TEMPLATE.format(
+            vendor=self.get_vendor(),
+            oui=self.get_oui(),
+            rev=self.get_rev(),
+            pn=self.get_pn(),
+            sn=self.get_sn(),
+            dc=self.get_dc(),
+            type=self.get_type(),
+            connector=self.get_connector(),
+            bitrate=self.get_bitrate(),
+            wavelength=self.get_wavelength(),
+            **self.get_max_fiber_lengths(),
+        ))
 
     def get_temp(self):
         return self.__get_diagnostic("temp")
@@ -453,55 +484,7 @@ def main():
 
     # Instantiate the I2C bus and SFP device:
     if args.device == "xem_i2c":
-        # Open device, either using the supplied serial or if there
-        # happens to be only one device connected:
-        xem = ok.okCFrontPanel()
-
-        # Mapping from internal XEM device IDs to human-readable board
-        # names. Done at runtime to use the up-to-date OpalKelly board
-        # list from the used version of the FrontPanel SDK:
-        device_id_str_map = {
-            int(getattr(xem, v)): v[3:]
-            for v in dir(xem) if v.startswith("brd")
-        }
-
-        xem_serial = args.xem_serial
-        if xem_serial is None:
-            cnt = xem.GetDeviceCount()
-            devices = [
-                (
-                    xem.GetDeviceListSerial(i),
-                    xem.GetDeviceListModel(i),
-                    device_id_str_map[xem.GetDeviceListModel(i)],
-                )
-                for i in range(cnt)
-            ]
-            assert cnt == 1, \
-                "Cannot automatically determine which XEM to connect to, " \
-                "please specify the --xem-serial argument.\n" \
-                "Available devices:" + "\n  - ".join([""] + [
-                    f"{serial}: \t {board}"
-                    for serial, _, board in devices
-                ])
-            xem_serial = devices[0][0]
-
-        assert xem.OpenBySerial(xem_serial) == 0, \
-            f"Failed to open OpalKelly board with serial \"{xem_serial}\"."
-
-        # Print some information about the device
-        print(f"Connected to device {xem.GetDeviceID()} with serial "
-              + f"{xem.GetSerialNumber()}!")
-
-        if args.xem_bitstream is not None:
-            print("Configuring FPGA using bitstream "
-                  + f"\"{args.xem_bitstream}\", please wait...")
-            assert xem.ConfigureFPGA(args.xem_bitstream) == 0, \
-                "Failed to configure the FPGA using the supplied bitstream."
-            time.sleep(1)
-
-        assert xem.IsFrontPanelEnabled(), \
-            "Bitstream is not OpalKelly FrontPanel-enabled or FPGA not " \
-            "configured, cannot continue!"
+        xem = open_xem(args.xem_serial, bitstream=args.xem_bitstream)
 
         # Instantiate the I2C bus wrapper based on the SFP argument
         wb = XEMWishbone(xem)
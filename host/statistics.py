@@ -18,9 +18,8 @@ from enum import IntEnum
 import argparse
 import textwrap
 
-import ok
-
 from .xem_wishbone import XEMWishbone
+from .xem_open import open_xem
 
 
 class Statistics:
@@ -77,6 +76,9 @@ class Statistics:
     def __read_wb_addr(self, addr):
         return self.wb.read(self.offset + addr)
 
+    def __read_wb_addrs(self, addrs):
+        return self.wb.bulk_read([self.offset + addr for addr in addrs])
+
     def __get_diagnostic(self, diag):
         assert diag in self.DIAGNOSTIC_FIELDS
         df = self.DIAGNOSTIC_FIELDS[diag]
@@ -88,6 +90,19 @@ class Statistics:
             **df,
         }
 
+    def get_diagnostics(self):
+        # Fetch all fields in a single bulk transfer
+        vals = self.__read_wb_addrs(
+            [df["val_addr"] for df in self.DIAGNOSTIC_FIELDS.values()])
+
+        return {
+            d: {
+                "val": val,
+                **df,
+            }
+            for (d, df), val in zip(self.DIAGNOSTIC_FIELDS.items(), vals)
+        }
+
     def get_temp(self):
         return self.__get_diagnostic("temp")
 
@@ -95,8 +110,7 @@ class Statistics:
         # Construct output first and then print it for less flicker
         output = "Diagnostics:" + "\n"
         output += f"  {'':50} {'VAL':>8s} \n"
-        for d in self.DIAGNOSTIC_FIELDS.keys():
-            v = self.__get_diagnostic(d)
+        for d, v in self.get_diagnostics().items():
             output += f"  {d:20} {'(' + v['unit'] + ')':>27} " + f": {v['val']:8} \n"
         print(output)
 
@@ -112,62 +126,7 @@ def main():
 
     args = parser.parse_args()
 
-    # Open device, either using the supplied serial or if there
-    # happens to be only one device connected:
-    xem = ok.okCFrontPanel()
-
-    # Mapping from internal XEM device IDs to human-readable board
-    # names. Done at runtime to use the up-to-date OpalKelly board
-    # list from the used version of the FrontPanel SDK:
-    device_id_str_map = {
-        int(getattr(xem, v)): v[3:] for v in dir(xem) if v.startswith("brd")
-    }
-
-    xem_serial = args.xem_serial
-    if xem_serial is None:
-        cnt = xem.GetDeviceCount()
-        devices = [
-            (
-                xem.GetDeviceListSerial(i),
-                xem.GetDeviceListModel(i),
-                device_id_str_map[xem.GetDeviceListModel(i)],
-            )
-            for i in range(cnt)
-        ]
-        assert cnt == 1, (
-            "Cannot automatically determine which XEM to connect to, "
-            "please specify the --xem-serial argument.\n"
-            "Available devices:"
-            + "\n  - ".join(
-                [""] + [f"{serial}: \t {board}" for serial, _, board in devices]
-            )
-        )
-        xem_serial = devices[0][0]
-
-    assert (
-        xem.OpenBySerial(xem_serial) == 0
-    ), f'Failed to open OpalKelly board with serial "{xem_serial}".'
-
-    # Print some information about the device
-    print(
-        f"Connected to device {xem.GetDeviceID()} with serial "
-        + f"{xem.GetSerialNumber()}!"
-    )
-
-    if args.xem_bitstream is not None:
-        print(
-            "Configuring FPGA using bitstream "
-            + f'"{args.xem_bitstream}", please wait...'
-        )
-        assert (
-            xem.ConfigureFPGA(args.xem_bitstream) == 0
-        ), "Failed to configure the FPGA using the supplied bitstream."
-        time.sleep(1)
-
-    assert xem.IsFrontPanelEnabled(), (
-        "Bitstream is not OpalKelly FrontPanel-enabled or FPGA not "
-        "configured, cannot continue!"
-    )
+    xem = open_xem(args.xem_serial, bitstream=args.xem_bitstream)
 
     wb = XEMWishbone(xem)
 
@@ -15,7 +15,7 @@
 
 from enum import IntEnum
 
-from .xem_wishbone import WishboneTransaction, WishboneRW
+from .xem_wishbone import WishboneRW
 from .i2c import I2CInterface, I2CRW
 
 class WBI2CReg(IntEnum):
@@ -30,49 +30,52 @@ class WBI2CReg(IntEnum):
 class WishboneI2C(I2CInterface):
     def __init__(self, wb, i2c_base):
         self.wb = wb
+        self.wb_chunk_size = wb.bulk_chunk_size()
         self.i2c_base = i2c_base
         self.queue_wb_writes_enabled = False
-        self.queued_wb_writes = []
+        self.queued_wb_addrs = []
+        self.queued_wb_vals = []
 
-        # Setup appropriate I2C clocking
+        # Setup appropriate I2C clocking. These only touch the core's
+        # configuration registers, so issue them as a single bulk transfer.
+        self.queue_wb_writes()
         self.__write_prer(0x00CA)
         self.__write_wb(WBI2CReg.CTR, 0x80)
+        self.queue_wb_writes(False)
 
     def __write_wb(self, addr, val):
         if self.queue_wb_writes_enabled:
-            self.queued_wb_writes += [(self.i2c_base + addr, val)]
+            self.queued_wb_addrs.append(self.i2c_base + addr)
+            self.queued_wb_vals.append(val)
+            # Defer writes until they fill an entire bulk transfer. This
+            # always leaves room for a trailing read in __read_wb.
+            if len(self.queued_wb_addrs) >= self.wb_chunk_size:
+                self.flush_writes()
         else:
             self.wb.write(self.i2c_base + addr, val)
 
     def __read_wb(self, addr):
-        if len(self.queued_wb_writes) > 0:
-            txns = [
-                WishboneTransaction(
-                    waddr, WishboneRW.Write, write_val=val)
-                for waddr, val in self.queued_wb_writes
-            ]
-            read_txn = WishboneTransaction(
-                self.i2c_base + addr, WishboneRW.Read)
-            txns += [read_txn]
-            assert self.wb.bulk_chunk_size() >= len(txns)
-            self.wb.bulk_process(txns)
-            assert read_txn.is_fulfilled()
-            self.queued_wb_writes = []
-            return read_txn.read_val
+        if len(self.queued_wb_addrs) > 0:
+            addrs = self.queued_wb_addrs + [self.i2c_base + addr]
+            vals = self.queued_wb_vals + [0]
+            rws = [WishboneRW.Write] * len(self.queued_wb_addrs)
+            rws.append(WishboneRW.Read)
+            assert self.wb_chunk_size >= len(addrs)
+            read_val = self.wb.bulk_process_raw(addrs, vals, rws)[-1]
+            self.queued_wb_addrs = []
+            self.queued_wb_vals = []
+            return read_val
         else:
             return self.wb.read(self.i2c_base + addr)
 
     def flush_writes(self):
-        if len(self.queued_wb_writes) > 0:
-            txns = [
-                WishboneTransaction(
-                    waddr, WishboneRW.Write, write_val=val)
-                for waddr, val in self.queued_wb_writes
-            ]
-            assert self.wb.bulk_chunk_size() >= len(txns)
-            self.wb.bulk_process(txns)
-            assert txns[-1].is_fulfilled()
-            self.queued_wb_writes = []
+        if len(self.queued_wb_addrs) > 0:
+            assert self.wb_chunk_size >= len(self.queued_wb_addrs)
+            self.wb.bulk_process_raw(
+                self.queued_wb_addrs, self.queued_wb_vals,
+                [WishboneRW.Write] * len(self.queued_wb_addrs))
+            self.queued_wb_addrs = []
+            self.queued_wb_vals = []
 
     def queue_wb_writes(self, queue_writes=True):
         if not queue_writes:
@@ -80,14 +83,22 @@ class WishboneI2C(I2CInterface):
         self.queue_wb_writes_enabled = queue_writes
 
     def __read_prer(self):
-        return (
-            self.__read_wb(WBI2CReg.PRER_HIGH) << 8
-            | self.__read_wb(WBI2CReg.PRER_LOW)
-        )
+        # Read both prescaler halves in a single transfer
+        self.flush_writes()
+        prer_low, prer_high = self.wb.bulk_read([
+            self.i2c_base + WBI2CReg.PRER_LOW,
+            self.i2c_base + WBI2CReg.PRER_HIGH,
+        ])
+        return prer_high << 8 | prer_low
 
     def __write_prer(self, val):
+        # Write both prescaler halves in a single transfer, unless the caller
+        # is already queueing writes
+        queue_writes = self.queue_wb_writes_enabled
+        self.queue_wb_writes()
         self.__write_wb(WBI2CReg.PRER_LOW, val & 0xFF)
         self.__write_wb(WBI2CReg.PRER_HIGH, (val >> 8) & 0xFF)
+        self.queue_wb_writes(queue_writes)
 
     def start(self, addr, rw):
         # Prevent users from accidentally passing in an 8-bit address (already
@@ -108,6 +119,10 @@ class WishboneI2C(I2CInterface):
         # Place the data on the bus
         self.__write_wb(WBI2CReg.SR, 0x10)
 
+    def read_ack(self):
+        self.__write_wb(WBI2CReg.SR, 0x20)
+        return self.__read_wb(WBI2CReg.RXR)
+
     # TODO: does this have to be a composite function?
     def read_ack_stop(self):
         self.__write_wb(WBI2CReg.SR, 0x68)
@@ -0,0 +1,82 @@
+# OpalKelly XEM Device Selection Helper
+#
+# This file is part of the Time Tagger software defined digital data
+# acquisition FPGA-link reference design.
+#
+# Copyright (C) 2022 Swabian Instruments, All Rights Reserved
+#
+# This file is provided under the terms and conditions of the BSD 3-Clause
+# license, accessible under https://opensource.org/licenses/BSD-3-Clause.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+import time
+
+import ok
+
+# Mapping from internal XEM device IDs to human-readable board names. Built
+# on first use from the up-to-date OpalKelly board list of the used version
+# of the FrontPanel SDK, as enumerating the SDK's attributes is not free.
+_device_id_str_map = None
+
+def device_id_str_map(xem):
+    global _device_id_str_map
+    if _device_id_str_map is None:
+        _device_id_str_map = {
+            int(getattr(xem, v)): v[3:]
+            for v in dir(xem) if v.startswith("brd")
+        }
+    return _device_id_str_map
+
+def open_xem(serial=None, required_model=None, bitstream=None,
+             require_frontpanel=True):
+    # Open device, either using the supplied serial or if there
+    # happens to be only one device connected:
+    xem = ok.okCFrontPanel()
+
+    if serial is None:
+        board_names = device_id_str_map(xem)
+        cnt = xem.GetDeviceCount()
+        devices = [
+            (
+                xem.GetDeviceListSerial(i),
+                xem.GetDeviceListModel(i),
+                board_names[xem.GetDeviceListModel(i)],
+            )
+            for i in range(cnt)
+        ]
+        assert cnt == 1, \
+            "Cannot automatically determine which XEM to connect to, " \
+            "please specify the --xem-serial argument.\n" \
+            "Available devices:" + "\n  - ".join([""] + [
+                f"{serial}: \t {board}"
+                for serial, _, board in devices
+            ])
+        serial = devices[0][0]
+
+    assert xem.OpenBySerial(serial) == 0, \
+        f"Failed to open OpalKelly board with serial \"{serial}\"."
+
+    # required_model is the name of a FrontPanel board constant, such as
+    # "brdXEM8320AU25P"
+    if required_model is not None:
+        assert xem.GetBoardModel() == getattr(xem, required_model), \
+            "Selected OpalKelly board is not supported by this script."
+
+    # Print some information about the device
+    print(f"Connected to device {xem.GetDeviceID()} with serial "
+          + f"{xem.GetSerialNumber()}!")
+
+    if bitstream is not None:
+        print("Configuring FPGA using bitstream "
+              + f"\"{bitstream}\", please wait...")
+        assert xem.ConfigureFPGA(bitstream) == 0, \
+            "Failed to configure the FPGA using the supplied bitstream."
+        time.sleep(1)
+
+    if require_frontpanel:
+        assert xem.IsFrontPanelEnabled(), \
+            "Bitstream is not OpalKelly FrontPanel-enabled or FPGA not " \
+            "configured, cannot continue!"
+
+    return xem
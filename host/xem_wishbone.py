@@ -13,6 +13,7 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import struct
 from enum import IntEnum
 
 # Taken from https://stackoverflow.com/a/312464, licensed under a
@@ -23,11 +24,23 @@ def chunks(lst, n):
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
+# Wishbone bridge request and response word layout: 32 bit data, followed by
+# the 31 bit address with the read/write flag in its most significant bit.
+WB_TXN_STRUCT = struct.Struct("<II")
+
 class WishboneRW(IntEnum):
     Read = 0
     Write = 1
 
+# Plain integer copies of the WishboneRW values, avoiding the enum attribute
+# lookups in the per-transaction packing loops
+_WB_READ = int(WishboneRW.Read)
+_WB_WRITE = int(WishboneRW.Write)
+
 class WishboneTransaction():
+    __slots__ = (
+        "addr", "read_write", "write_val", "read_val", "fulfilled")
+
     def __init__(self, addr: int, read_write: WishboneRW, write_val=None):
         self.addr = addr
         self.read_write = read_write
@@ -43,11 +56,17 @@ class WishboneTransaction():
         return self.read_val
 
 class XEMWishbone():
+    __slots__ = ("xem", "delay", "block_cnt", "data_in", "data_out")
+
     def __init__(self, xem, block_cnt=4):
         self.xem = xem
         self.delay = 0.1
         self.block_cnt = block_cnt
 
+        # Pipe transfer buffers, reused across bulk_process calls
+        self.data_in = bytearray(16 * self.block_cnt)
+        self.data_out = bytearray(16 * self.block_cnt)
+
     def read(self, addr):
         txn = WishboneTransaction(addr, WishboneRW.Read)
         self.bulk_process([txn])
@@ -59,27 +78,67 @@ class XEMWishbone():
         self.bulk_process([txn])
         assert txn.is_fulfilled()
 
+    def bulk_read(self, addrs):
+        # Issue all reads through a single bulk_process call, such that up to
+        # bulk_chunk_size() of them share one pipe round-trip
+        txns = [WishboneTransaction(addr, WishboneRW.Read) for addr in addrs]
+        self.bulk_process(txns)
+        assert all(t.is_fulfilled() for t in txns)
+        return [t.read_val for t in txns]
+
     def bulk_process(self, txns):
-        data_in = bytearray(b"\0") * (16 * self.block_cnt)
-        data_out = bytearray(b"\0") * (16 * self.block_cnt)
-
-        for chunked_txns in chunks(txns, 2 * self.block_cnt):
-            for i, t in enumerate(chunked_txns):
-                data_in[(i*8)+4:(i*8)+8] = t.addr.to_bytes(4, byteorder="little")
-                data_in[(i*8)+7] = data_in[(i*8)+7] & 0x7F
-                if t.read_write == WishboneRW.Write:
-                    data_in[(i*8)+0:(i*8)+4] = t.write_val.to_bytes(4, byteorder="little")
-                    data_in[(i*8)+7] = data_in[(i*8)+7] | (1 << 7)
-                elif t.read_write != WishboneRW.Read:
+        read_vals = self.bulk_process_raw(
+            [t.addr for t in txns],
+            [t.write_val for t in txns],
+            [t.read_write for t in txns])
+        for t, read_val in zip(txns, read_vals):
+            t.read_val = read_val
+            t.fulfilled = True
+
+    def bulk_process_raw(self, addrs, vals, rws):
+        # Process transactions given as parallel sequences of addresses, write
+        # values and WishboneRW directions, without allocating a
+        # WishboneTransaction per access. Returns the read value of every
+        # transaction, or None for writes.
+        assert len(addrs) == len(vals) == len(rws)
+        data_in = self.data_in
+        data_out = self.data_out
+        read_vals = [None] * len(addrs)
+
+        # Bind frequently used methods once, outside of the per-transaction
+        # loops below
+        pack_into = WB_TXN_STRUCT.pack_into
+        unpack_from = WB_TXN_STRUCT.unpack_from
+        write_pipe_in = self.xem.WriteToBlockPipeIn
+        read_pipe_out = self.xem.ReadFromBlockPipeOut
+        wb_read = _WB_READ
+        wb_write = _WB_WRITE
+
+        for chunk in chunks(range(len(addrs)), 2 * self.block_cnt):
+            for i, j in enumerate(chunk):
+                if rws[j] == wb_write:
+                    pack_into(
+                        data_in, i * 8,
+                        vals[j], (addrs[j] & 0x7FFFFFFF) | (1 << 31))
+                elif rws[j] == wb_read:
+                    pack_into(data_in, i * 8, 0, addrs[j] & 0x7FFFFFFF)
+                else:
                     raise NotImplementedError()
 
-            self.xem.WriteToBlockPipeIn(0x83, 64, data_in)
-            self.xem.ReadFromBlockPipeOut(0xA4, 64, data_out)
+            # Pad unused slots with reads of address 0, rather than replaying
+            # stale requests left in the buffer by a previous transfer
+            used = len(chunk) * 8
+            if used < len(data_in):
+                data_in[used:] = bytes(len(data_in) - used)
+
+            write_pipe_in(0x83, 64, data_in)
+            read_pipe_out(0xA4, 64, data_out)
+
+            for i, j in enumerate(chunk):
+                if rws[j] == wb_read:
+                    read_vals[j] = unpack_from(data_out, i * 8)[0]
 
-            for i, t in enumerate(chunked_txns):
-                if t.read_write == WishboneRW.Read:
-                    t.read_val = int.from_bytes(data_out[(i*8)+0:(i*8)+3], byteorder="little")
-                t.fulfilled = True
+        return read_vals
 
     def bulk_chunk_size(self):
         return 2 * self.block_cnt
@@ -19,6 +19,8 @@
 import argparse
 import ok
 
+from common.xem_open import open_xem
+
 def main():
     parser = argparse.ArgumentParser(
         description=("Configure the XEM3820 device settings for the FPGALink "
@@ -29,47 +31,13 @@ def main():
 
     args = parser.parse_args()
 
-    # Open device, either using the supplied serial or if there
-    # happens to be only one device connected:
-    xem = ok.okCFrontPanel()
-
-    # Mapping from internal XEM device IDs to human-readable board
-    # names. Done at runtime to use the up-to-date OpalKelly board
-    # list from the used version of the FrontPanel SDK:
-    device_id_str_map = {
-        int(getattr(xem, v)): v[3:]
-        for v in dir(xem) if v.startswith("brd")
-    }
-
-    xem_serial = args.xem_serial
-    if xem_serial is None:
-        cnt = xem.GetDeviceCount()
-        devices = [
-            (
-                xem.GetDeviceListSerial(i),
-                xem.GetDeviceListModel(i),
-                device_id_str_map[xem.GetDeviceListModel(i)],
-            )
-            for i in range(cnt)
-        ]
-        assert cnt == 1, \
-            "Cannot automatically determine which XEM to connect to, " \
-            "please specify the --xem-serial argument.\n" \
-            "Available devices:" + "\n  - ".join([""] + [
-                f"{serial}: \t {board}"
-                for serial, _, board in devices
-            ])
-        xem_serial = devices[0][0]
-
-    assert xem.OpenBySerial(xem_serial) == 0, \
-        f"Failed to open OpalKelly board with serial \"{xem_serial}\"."
-
-    assert xem.GetBoardModel() == xem.brdXEM8320AU25P, \
-        "Selected OpalKelly board is not supported by this script."
-
-    # Print some information about the device
-    print(f"Connected to device {xem.GetDeviceID()} with serial "
-          + f"{xem.GetSerialNumber()}!")
+    # The device settings are stored independently of the FPGA
+    # configuration, hence do not require a FrontPanel-enabled bitstream
+    xem = open_xem(
+        args.xem_serial,
+        required_model="brdXEM8320AU25P",
+        require_frontpanel=False,
+    )
 
     if args.command == "configure":
         devInfo = ok.okTDeviceInfo()
@@ -13,8 +13,10 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import io
 import time
 import argparse
+from array import array
 
 from common.i2c import I2CRW, MockI2CBus, MockI2CSlave, I2CInterface
 from common.xem_wishbone import XEMWishbone
@@ -34,30 +36,52 @@ class I2CSi5338BPLL():
         self.current_page = None
 
     def write_pll_i2c(self, pll_reg_addr, data):
+        # The I2C bus queues these writes. They are flushed along with the next
+        # read, once they fill a bulk transfer, or on an explicit flush().
         self.i2c.start(0xE0 >> 1, I2CRW.WRITE)
         self.i2c.write(pll_reg_addr & 0xFF)
         self.i2c.write(data & 0xFF)
         self.i2c.stop()
-        self.i2c.flush_writes()
+
+    def write_pll_i2c_seq(self, pll_reg_addr, data):
+        # Burst write to consecutive registers in a single I2C transaction,
+        # relying on the Si5338 auto-incrementing its register address
+        self.i2c.start(0xE0 >> 1, I2CRW.WRITE)
+        self.i2c.write(pll_reg_addr & 0xFF)
+        for d in data:
+            self.i2c.write(d & 0xFF)
+        self.i2c.stop()
 
     def read_pll_i2c(self, pll_reg_addr):
         self.i2c.start(0xE0 >> 1, I2CRW.WRITE)
         self.i2c.write(pll_reg_addr & 0xFF)
         self.i2c.stop()
-        self.i2c.flush_writes()
         self.i2c.start(0xE0 >> 1, I2CRW.READ)
         return self.i2c.read_ack_stop()
 
+    def flush(self):
+        self.i2c.flush_writes()
+
+    def select_pll_page(self, page):
+        if self.current_page != page:
+            self.write_pll_i2c(0xFF, page)
+            self.current_page = page
+
     def write_pll_reg(self, pll_page_reg_addr, data):
-        if self.current_page != (pll_page_reg_addr >> 8) & 0x01:
-            self.write_pll_i2c(0xFF, (pll_page_reg_addr >> 8) & 0x01)
-            self.current_page = (pll_page_reg_addr >> 8) & 0x01
+        self.select_pll_page((pll_page_reg_addr >> 8) & 0x01)
         self.write_pll_i2c(pll_page_reg_addr & 0xFF, data)
 
+    def write_pll_reg_seq(self, pll_page_reg_addr, data):
+        # Bursts must not wrap around into the next page
+        assert (pll_page_reg_addr & 0xFF) + len(data) <= 0x100
+        self.select_pll_page((pll_page_reg_addr >> 8) & 0x01)
+        self.write_pll_i2c_seq(pll_page_reg_addr & 0xFF, data)
+        if (pll_page_reg_addr & 0xFF) + len(data) == 0x100:
+            # The burst ended by writing the page register itself
+            self.current_page = None
+
     def read_pll_reg(self, pll_page_reg_addr):
-        if self.current_page != (pll_page_reg_addr >> 8) & 0x01:
-            self.write_pll_i2c(0xFF, (pll_page_reg_addr >> 8) & 0x01)
-            self.current_page = (pll_page_reg_addr >> 8) & 0x01
+        self.select_pll_page((pll_page_reg_addr >> 8) & 0x01)
         return self.read_pll_i2c(pll_page_reg_addr & 0xFF)
 
     def clear_pll_reg_bit(self, pll_page_reg_addr, bitmask):
@@ -71,45 +95,66 @@ class I2CSi5338BPLL():
         self.write_pll_reg(pll_page_reg_addr, r)
 
     def flash_csv(self, conf_csv, skip_first=False, pll_lock_timeout=10, log=False):
-        # Configuration preamble
-        self.set_pll_reg_bit(230, 1 << 4) # Disable Outputs, OEB_ALL = 1
-        self.set_pll_reg_bit(241, 1 << 7) # Pause LOL, DIS_LOL = 1
-
-        # Write the configuration
-        register_contents = {}
-
-        filtered = filter(
-            lambda l: not l.startswith("#") and l.strip() != "",
-            conf_csv.splitlines()
+        # Parse the configuration up front, such that a malformed file is
+        # rejected before touching the PLL
+        # Accept either the file contents or an iterable of lines, such as
+        # an open file object
+        if isinstance(conf_csv, str):
+            conf_csv = io.StringIO(conf_csv)
+        filtered = (
+            l for l in (l.strip() for l in conf_csv)
+            if l and not l.startswith("#")
         )
 
         if skip_first:
             next(filtered)
 
+        addrs = array("H")
+        vals = array("B")
         for line in filtered:
-            split = line.strip().split(',')
+            split = line.split(',')
             assert len(split) == 2
-            addr = int(split[0], 10)
-            val = int(split[1][:-1], 16)
-            self.write_pll_reg(addr, val)
+            addrs.append(int(split[0], 10))
+            vals.append(int(split[1][:-1], 16))
+
+        # Configuration preamble
+        self.set_pll_reg_bit(230, 1 << 4) # Disable Outputs, OEB_ALL = 1
+        self.set_pll_reg_bit(241, 1 << 7) # Pause LOL, DIS_LOL = 1
+
+        # Write the configuration, as runs of consecutive registers within a
+        # page such that each run is a single I2C burst
+        run_start = 0
+        for i in range(1, len(addrs) + 1):
+            if i == len(addrs) or addrs[i] != addrs[i - 1] + 1 \
+                    or addrs[i] >> 8 != addrs[run_start] >> 8:
+                self.write_pll_reg_seq(addrs[run_start], vals[run_start:i])
+                run_start = i
 
         # Configuration postamble
         self.clear_pll_reg_bit(49, 1 << 7) # FCAL_OVRD_EN = 0
         self.set_pll_reg_bit(246, 1 << 1) # SOFT_RESET = 1
+        self.flush()
         time.sleep(0.025)
         self.write_pll_reg(241, 0x65)
 
         if log:
             print("Waiting for PLL to acquire lock.")
         pll_lock_time = 0
+        # Poll quickly at first, as the PLL usually locks within a few tens
+        # of milliseconds, backing off to the original 0.5s interval
+        poll_interval = 0.01
+        # Register 218 is on page 0. Nothing switches pages while polling, so
+        # select it once and read the register without the page check.
+        self.select_pll_page(0)
         r = None
-        while (r := self.read_pll_reg(218) & 0b10001) != 0x00:
+        while (r := self.read_pll_i2c(218) & 0b10001) != 0x00:
             if pll_lock_time >= pll_lock_timeout:
                 raise RuntimeError("PLL did not acquire lock in time!")
 
             # print(f"Register 218: 0x{r:02x}")
-            time.sleep(0.5)
-            pll_lock_time += 0.5
+            time.sleep(poll_interval)
+            pll_lock_time += poll_interval
+            poll_interval = min(poll_interval * 2, 0.5)
 
         if log:
             print("PLL locked, finishing configuration and enabling outputs!")
@@ -119,6 +164,7 @@ class I2CSi5338BPLL():
         self.set_pll_reg_bit(47, 0b00010100)
         self.set_pll_reg_bit(49, 1 << 7)
         self.clear_pll_reg_bit(230, 1 << 4)
+        self.flush()
         if log:
             print("Done!")
 
@@ -136,60 +182,13 @@ def main():
 
     # Instantiate the I2C bus and SFP device:
     if args.device == "xem_i2c":
-        import ok
-
-        # Open device, either using the supplied serial or if there
-        # happens to be only one device connected:
-        xem = ok.okCFrontPanel()
-
-        # Mapping from internal XEM device IDs to human-readable board
-        # names. Done at runtime to use the up-to-date OpalKelly board
-        # list from the used version of the FrontPanel SDK:
-        device_id_str_map = {
-            int(getattr(xem, v)): v[3:]
-            for v in dir(xem) if v.startswith("brd")
-        }
-
-        xem_serial = args.xem_serial
-        if xem_serial is None:
-            cnt = xem.GetDeviceCount()
-            devices = [
-                (
-                    xem.GetDeviceListSerial(i),
-                    xem.GetDeviceListModel(i),
-                    device_id_str_map[xem.GetDeviceListModel(i)],
-                )
-                for i in range(cnt)
-            ]
-            assert cnt == 1, \
-                "Cannot automatically determine which XEM to connect to, " \
-                "please specify the --xem-serial argument.\n" \
-                "Available devices:" + "\n  - ".join([""] + [
-                    f"{serial}: \t {board}"
-                    for serial, _, board in devices
-                ])
-            xem_serial = devices[0][0]
-
-        assert xem.OpenBySerial(xem_serial) == 0, \
-            f"Failed to open OpalKelly board with serial \"{xem_serial}\"."
-
-        assert xem.GetBoardModel() == xem.brdXEM8350KU060, \
-            "Selected OpalKelly board is not supported by this script."
-
-        # Print some information about the device
-        print(f"Connected to device {xem.GetDeviceID()} with serial "
-              + f"{xem.GetSerialNumber()}!")
-
-        if args.xem_bitstream is not None:
-            print("Configuring FPGA using bitstream "
-                  + f"\"{args.xem_bitstream}\", please wait...")
-            assert xem.ConfigureFPGA(args.xem_bitstream) == 0, \
-                "Failed to configure the FPGA using the supplied bitstream."
-            time.sleep(1)
-
-        assert xem.IsFrontPanelEnabled(), \
-            "Bitstream is not OpalKelly FrontPanel-enabled or FPGA not " \
-            "configured, cannot continue!"
+        from common.xem_open import open_xem
+
+        xem = open_xem(
+            args.xem_serial,
+            required_model="brdXEM8350KU060",
+            bitstream=args.xem_bitstream,
+        )
 
         # Instantiate the I2C bus wrapper based on the SFP argument
         wb = XEMWishbone(xem)
@@ -211,7 +210,7 @@ def main():
 
         with open(args.input_csv, "r") as f:
             print(f"Flashing {args.input_csv} to PLL, please wait.")
-            pll.flash_csv(f.read())
+            pll.flash_csv(f)
             print("Done. PLL has acquired lock with new configuration.")
 
 
@@ -13,44 +13,89 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
-import tempfile
+import os
 from pathlib import Path
+from cocotb.triggers import ClockCycles
 from cocotb_test.simulator import run
 
+async def pulse_reset(clk, *rsts, cycles=2):
+    # Assert the given active-high resets for a number of clock cycles,
+    # preceded and followed by the same number of idle cycles
+    for rst in rsts:
+        rst.setimmediatevalue(0)
+    await ClockCycles(clk, cycles)
+    for rst in rsts:
+        rst.value = 1
+    await ClockCycles(clk, cycles)
+    for rst in rsts:
+        rst.value = 0
+    await ClockCycles(clk, cycles)
+
+def random_pause_generator(rng, chunk_bits=4096):
+    # Yield random pause flags for a cocotbext-axi source or sink. Draw them
+    # in chunks of random bits rather than calling the RNG once per cycle.
+    while True:
+        bits = format(rng.getrandbits(chunk_bits), f"0{chunk_bits}b")
+        for b in bits:
+            yield b == "1"
+
 def cocotb_test(dut, test_module, verilog_sources, parameters={}, extra_env={}):
     tests_dir = Path(__file__).parent
     sim_build_dir = tests_dir / "sim_build" / dut
 
-    with tempfile.NamedTemporaryFile(prefix="dump_insn_mod_", suffix=".v") as dump_insn_mod:
-        dump_insn_mod_name = Path(dump_insn_mod.name).stem
-        params_string = "".join([
-            f"_{k}-{v}"
-            for k, v in parameters.items()
-        ])
-        dump_insn_mod.write(f"""
+    # Tracing every signal of the design slows down the simulation
+    # considerably, hence only dump waveforms when requested by setting the
+    # WAVES environment variable to 1
+    waves = bool(int(os.environ.get("WAVES", "0")))
+
+    params_string = "".join([
+        f"_{k}-{v}"
+        for k, v in parameters.items()
+    ])
+
+    # The dump module is written to a stable path in the build directory and
+    # only rewritten when its contents change. This way, cocotb-test finds
+    # an up-to-date simulator binary and skips recompiling an unchanged
+    # design. The parameters are recorded in the module too, such that
+    # changing them forces a rebuild.
+    dump_insn_mod_name = "dump_insn_mod"
+    dump_insn_mod_path = sim_build_dir / f"{dump_insn_mod_name}.v"
+    if waves:
+        dump_insn_mod = f"""
+            // Parameters: {params_string}
             module {dump_insn_mod_name} ();
                 initial begin
                     $dumpfile("{(sim_build_dir / (dut + params_string)).resolve()}.fst");
                     $dumpvars(0, {dut});
                 end
             endmodule
-        """.encode("utf-8"))
-        dump_insn_mod.flush()
-
-        verilog_sources += [
-            dump_insn_mod.name,
-        ]
-
-        run(
-            python_search=[str(tests_dir)],
-            verilog_sources=[str(path) for path in verilog_sources],
-            toplevel=[dut, dump_insn_mod_name],
-            module=test_module,
-            parameters=parameters,
-            sim_build=sim_build_dir,
-            plus_args=["-fst"],
-            # Don't use the builtin waveform tracer, doesn't allow us to save
-            # different wave files for each pytest parameterized fixture run.
-            waves=False,
-            extra_env=extra_env,
-        )
+        """
+    else:
+        dump_insn_mod = f"""
+            // Parameters: {params_string}
+            module {dump_insn_mod_name} ();
+            endmodule
+        """
+
+    sim_build_dir.mkdir(parents=True, exist_ok=True)
+    if not dump_insn_mod_path.exists() \
+            or dump_insn_mod_path.read_text() != dump_insn_mod:
+        dump_insn_mod_path.write_text(dump_insn_mod)
+
+    verilog_sources += [
+        dump_insn_mod_path,
+    ]
+
+    run(
+        python_search=[str(tests_dir)],
+        verilog_sources=[str(path) for path in verilog_sources],
+        toplevel=[dut, dump_insn_mod_name],
+        module=test_module,
+        parameters=parameters,
+        sim_build=sim_build_dir,
+        plus_args=["-fst"] if waves else [],
+        # Don't use the builtin waveform tracer, doesn't allow us to save
+        # different wave files for each pytest parameterized fixture run.
+        waves=False,
+        extra_env=extra_env,
+    )
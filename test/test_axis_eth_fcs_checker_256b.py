@@ -39,15 +39,6 @@ from cocotbext.eth import XgmiiSource, XgmiiFrame, XgmiiSink
 
 import misc
 
-# Hack to support randbytes method for Python < 3.9
-if not hasattr(random.Random, "randbytes"):
-
-    def randbytes_polyfill(self, n):
-        """Generate n random bytes."""
-        return self.getrandbits(n * 8).to_bytes(n, "little")
-
-    random.Random.randbytes = randbytes_polyfill
-
 
 @cocotb.test()
 async def axis_fcs_checker_testbench(dut, packets=[]):
@@ -57,20 +48,33 @@ async def axis_fcs_checker_testbench(dut, packets=[]):
     packets = []
     valid_packets = []
 
-    for _ in range(10):
-        # The packets need to have a length % 256 = 0
-        packet = rng.randbytes(32 + 32 * rng.randrange(9))
-        zlib_fcs = zlib.crc32(packet)
-
-        if rng.randrange(2) == 1:
+    # Draw all payload lengths first, such that the payloads can be sliced
+    # out of a single block of random bytes. The packets need to have a
+    # length % 256 = 0.
+    lengths = [32 + 32 * rng.randrange(9) for _ in range(10)]
+    payload_len = sum(lengths)
+    # Equivalent to randbytes(), which is only available on Python >= 3.9
+    payload_bytes = rng.getrandbits(payload_len * 8).to_bytes(payload_len, "little")
+    payloads = []
+    offset = 0
+    for length in lengths:
+        payloads.append(payload_bytes[offset:offset + length])
+        offset += length
+
+    # Then decide which packets to corrupt, and compute their FCS in one pass
+    corrupt = [rng.randrange(2) == 1 for _ in payloads]
+
+    fcs = [zlib.crc32(payload) for payload in payloads]
+
+    for payload, zlib_fcs, corrupted in zip(payloads, fcs, corrupt):
+        if corrupted:
             # Corrupt crc
             zlib_fcs = (0xDEAD << 16) | (zlib_fcs ^ 1)
         else:
             # Valid packet
-            valid_packets += [packet]
+            valid_packets.append(payload)
 
-        packet += zlib_fcs.to_bytes(4, byteorder="little")
-        packets += [packet]
+        packets.append(payload + zlib_fcs.to_bytes(4, byteorder="little"))
 
     # Set some non high-impedance values on the AXI source bus
     dut.s_axis_tvalid.value = 0
@@ -85,15 +89,7 @@ async def axis_fcs_checker_testbench(dut, packets=[]):
     cocotb.start_soon(Clock(dut.clk, 2, units="ns").start())
 
     # Reset the simulation, propagating these idle signals
-    dut.rst.setimmediatevalue(0)
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.rst.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.rst.value = 0
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await misc.pulse_reset(dut.clk, dut.rst)
 
     # Instantiate a collector for the resulting AXI bus
     axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "m_axis"), dut.clk, dut.rst)
@@ -107,29 +103,19 @@ async def axis_fcs_checker_testbench(dut, packets=[]):
 
     # Randomly assert and deassert valid / ready on the source / sink
     # respectively
-    def random_pause_generator():
-        while True:
-            yield rng.randrange(2) == 1
-
-    axis_source.set_pause_generator(random_pause_generator())
+    axis_source.set_pause_generator(misc.random_pause_generator(rng))
 
     # Insert the packets
-    sent_packets = [(await axis_source.send(p)) for p in packets]
-
-    # Read back all packets
-    recv_packets = []
-    for _ in range(len(valid_packets)):
-        # We must wait for a packet to be ready before we receive it
-        while axis_sink.empty():
-            await RisingEdge(dut.clk)
+    for p in packets:
+        axis_source.send_nowait(p)
+    await axis_source.wait()
 
-        p = await axis_sink.recv()
-        recv_packets += [p]
+    # Read back all packets. recv() blocks until a complete packet has been
+    # received.
+    recv_packets = [await axis_sink.recv() for _ in range(len(valid_packets))]
 
     for vp, rp in zip(valid_packets, recv_packets):
-        assert len(vp) == len(rp)
-        for (vb, rb) in zip(vp, rp):
-            assert vb == rb
+        assert bytes(rp.tdata) == vp
 
 
 def test_axis_fcs_checker_256b():
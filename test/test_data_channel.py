@@ -5,6 +5,7 @@ import random
 from pathlib import Path
 import pytest
 import binascii
+import struct
 
 import cocotb_test.simulator
 import cocotb
@@ -20,36 +21,37 @@ from cocotbext.axi import (
 
 import misc
 
+# Packet header: MAC, ETHTYPE, MAGIC, version, reserved, type, sequence
+# number and wrap count
+HEADER_STRUCT = struct.Struct("<12s2s4sB4sBII")
+
 @cocotb.test()
 async def data_channel_testbench(dut, packets=[]):
     rng = random.Random(42)
 
     # Generate accurate header
     def gen_packet(tags, sequence, wrap_count):
-        header = (
-            b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"  # MAC
-            + b"\x80\x9B"  # ETHTYPE
-            + b"SITT"  # MAGIC
-            + b"\x00"  # Version
-            + b"\x00\x00\x00\x00"  # Reserved
-            + b"\x00"  # Type
-        )
-        header += sequence.to_bytes(4, byteorder="little")
-        header += wrap_count.to_bytes(4, byteorder="little")
-        data = header
-        for tag in tags:
-            data += tag.to_bytes(4, byteorder="little")
-        return data
-
-    def gen_tag(counter, subtime, channel):
-        event_type = 0b01
-        tag = (counter & 0xFFF) | ((subtime & 0xFFF) << 12) | ((channel & 0x3F) << 24) | (event_type << 30)
-        return tag
+        return HEADER_STRUCT.pack(
+            b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00",  # MAC
+            b"\x80\x9B",  # ETHTYPE
+            b"SITT",  # MAGIC
+            0,  # Version
+            b"\x00\x00\x00\x00",  # Reserved
+            0,  # Type
+            sequence,
+            wrap_count,
+        ) + struct.pack(f"<{len(tags)}I", *tags)
+
+    # Tags consist of the counter (bits 11:0), subtime (bits 23:12) and
+    # channel (bits 29:24) fields, followed by the event type (bits 31:30).
+    # The three random fields are adjacent, so draw them all at once.
+    event_type = 0b01
+    tag_event_type = event_type << 30
 
     packet_contents = [
         {
             "wrap_count": rng.getrandbits(32),
-            "tags": [gen_tag(rng.getrandbits(12), rng.getrandbits(12), rng.getrandbits(6)) for i in range((rng.randrange(20) + 1) * 8)], # Ensure only 256 bit words are sent
+            "tags": [rng.getrandbits(30) | tag_event_type for i in range((rng.randrange(20) + 1) * 8)], # Ensure only 256 bit words are sent
         } for i in range(20)
     ]
     # send sucessive packets
@@ -79,18 +81,7 @@ async def data_channel_testbench(dut, packets=[]):
     dut.m_axis_tready.value = 0
 
     # Reset the simulation, propagating these idle signals
-    dut.eth_rst.setimmediatevalue(0)
-    dut.usr_rst.setimmediatevalue(0)
-    await RisingEdge(dut.eth_clk)
-    await RisingEdge(dut.eth_clk)
-    dut.eth_rst.value = 1
-    dut.usr_rst.value = 1
-    await RisingEdge(dut.eth_clk)
-    await RisingEdge(dut.eth_clk)
-    dut.eth_rst.value = 0
-    dut.usr_rst.value = 0
-    await RisingEdge(dut.eth_clk)
-    await RisingEdge(dut.eth_clk)
+    await misc.pulse_reset(dut.eth_clk, dut.eth_rst, dut.usr_rst)
 
     # Instantiate a collector for the resulting AXI bus
     axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "m_axis"), dut.usr_clk, dut.usr_rst)
@@ -102,35 +93,21 @@ async def data_channel_testbench(dut, packets=[]):
     )
     axis_source.log.setLevel(logging.INFO)
 
-    def random_pause_generator():
-        while True:
-            yield rng.randrange(2) == 1
-
-    axis_source.set_pause_generator(random_pause_generator())
-    axis_sink.set_pause_generator(random_pause_generator())
+    axis_source.set_pause_generator(misc.random_pause_generator(rng))
+    axis_sink.set_pause_generator(misc.random_pause_generator(rng))
 
-    sent_packets = [(await axis_source.send(p)) for p in packets]
+    for p in packets:
+        axis_source.send_nowait(p)
+    await axis_source.wait()
 
-    recv_packets = []
-
-    for _ in range(len(packets)):
-        # We must wait for a packet to be ready before we receive it
-        while axis_sink.empty():
-            await RisingEdge(dut.usr_clk)
-
-        
-        p = await axis_sink.recv()
-        recv_packets += [p]
+    # recv() blocks until a complete packet has been received
+    recv_packets = [await axis_sink.recv() for _ in range(len(packets))]
 
     for pc, rp in zip(packet_contents, recv_packets):
         assert len(pc["tags"]) * 4 == len(rp.tdata)
 
-        tag_bytes =  []
-        for tag in pc["tags"]:
-            tag_bytes += tag.to_bytes(4, byteorder="little")
-
-        for (tb, rb) in zip(tag_bytes, rp.tdata):
-            assert tb == rb
+        tag_bytes = struct.pack(f"<{len(pc['tags'])}I", *pc["tags"])
+        assert bytes(rp.tdata) == tag_bytes
         assert pc["wrap_count"] == rp.tuser
     
 
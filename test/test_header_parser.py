@@ -20,6 +20,7 @@ import random
 from pathlib import Path
 import pytest
 import binascii
+import struct
 
 import cocotb_test.simulator
 import cocotb
@@ -35,23 +36,26 @@ from cocotbext.axi import (
 
 import misc
 
+# Packet header: MAC, ETHTYPE, MAGIC, version, reserved, type, sequence
+# number and wrap count
+HEADER_STRUCT = struct.Struct("<12s2s4sB4sBII")
+
 @cocotb.test()
 async def header_parser_testbench(dut, packets=[]):
     rng = random.Random(42)
 
     # Generate accurate header
     def gen_packet(data, sequence, wrap_count):
-        header = (
-            b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"  # MAC
-            + b"\x80\x9B"  # ETHTYPE
-            + b"SITT"  # MAGIC
-            + b"\x00"  # Version
-            + b"\x00\x00\x00\x00"  # Reserved
-            + b"\x00"  # Type
-        )
-        header += sequence.to_bytes(4, byteorder="little")
-        header += wrap_count.to_bytes(4, byteorder="little")
-        return header + data
+        return HEADER_STRUCT.pack(
+            b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00",  # MAC
+            b"\x80\x9B",  # ETHTYPE
+            b"SITT",  # MAGIC
+            0,  # Version
+            b"\x00\x00\x00\x00",  # Reserved
+            0,  # Type
+            sequence,
+            wrap_count,
+        ) + data
 
     # send sucessive packets
     packets = [gen_packet(b"\x00" * 20, i, 0) for i in range(100)]
@@ -69,15 +73,7 @@ async def header_parser_testbench(dut, packets=[]):
     dut.m_axis_tready.value = 0
 
     # Reset the simulation, propagating these idle signals
-    dut.rst.setimmediatevalue(0)
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.rst.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.rst.value = 0
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await misc.pulse_reset(dut.clk, dut.rst)
 
     # Instantiate a collector for the resulting AXI bus
     axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "m_axis"), dut.clk, dut.rst)
@@ -89,39 +85,29 @@ async def header_parser_testbench(dut, packets=[]):
     )
     axis_source.log.setLevel(logging.INFO)
 
-    def random_pause_generator():
-        while True:
-            yield rng.randrange(2) == 1
+    axis_source.set_pause_generator(misc.random_pause_generator(rng))
+    axis_sink.set_pause_generator(misc.random_pause_generator(rng))
 
-    axis_source.set_pause_generator(random_pause_generator())
-    axis_sink.set_pause_generator(random_pause_generator())
-    for p in packets:
-        await axis_source.send(p)
+    # Queue all packets at once and wait until they have been transmitted
+    async def push_all(pkts):
+        for p in pkts:
+            axis_source.send_nowait(p)
         await axis_source.wait()
+
+    await push_all(packets)
     assert dut.lost_packet == 0
-    for p in packets:
-        await axis_source.send(p)
-        await axis_source.wait()
+    await push_all(packets)
     assert dut.lost_packet == 1
 
     # Reset the simulation, propagating these idle signals
-    dut.rst.setimmediatevalue(0)
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.rst.value = 1
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.rst.value = 0
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-
-    for p in packets:
-        await axis_source.send(p)
-        await axis_source.wait()
+    await misc.pulse_reset(dut.clk, dut.rst)
+
+    await push_all(packets)
     assert dut.lost_packet == 0
 
-    for _ in range(1024):
-        await RisingEdge(dut.clk)
+    # Let the design idle for another 1024 clock cycles. Nothing is sampled
+    # meanwhile, so wait for the equivalent time in a single trigger.
+    await Timer(1024 * 2, units="ns")
 
 
 def test_header_parser():